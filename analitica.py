@@ -0,0 +1,155 @@
+"""
+Analítica de cartera
+Agregados por campaña (top deudores, deuda por año, registros por caso)
+calculados una sola vez sobre todo el dataset.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Rangos de registros por caso para la distribución
+RANGOS_REGISTROS = [0, 1, 5, 10, 25, 50, 100, 250, 500, np.inf]
+ETIQUETAS_RANGOS = ["1", "2-5", "6-10", "11-25", "26-50", "51-100", "101-250", "251-500", "500+"]
+
+
+def _anios(operacion):
+    """Año (aaaa) de cada período de operación"""
+    return pd.Series(operacion).astype(str).str[-6:].str[:4].to_numpy()
+
+
+def _datos_por_caso(gen):
+    """
+    Deuda y año de cada registro, y datos de cada caso, en el orden de los casos
+
+    Con GeneradorCompartido se leen los arrays mapeados y de las columnas de
+    texto solo se decodifican los códigos necesarios; con otros generadores se
+    toman caso por caso solo las columnas necesarias, sin unir los DataFrames.
+
+    Returns:
+        tuple: (lista de (ruc, campana, razon_social), registros por caso,
+                deuda por registro, año por registro como Categorical)
+    """
+    if hasattr(gen, 'codigos_columna'):
+        limites = sorted(
+            ((ruc, campana, inicio, fin)
+             for (ruc, campana), (inicio, fin) in gen.rucs_por_campana.items()),
+            key=lambda caso: caso[2]
+        )
+        codigos_razon, valores_razon = gen.codigos_columna('RAZON_SOCIAL')
+        casos = []
+        for ruc, campana, inicio, fin in limites:
+            codigo = int(codigos_razon[inicio]) if fin > inicio else -1
+            casos.append((ruc, campana, valores_razon[codigo] if codigo >= 0 else ''))
+        registros = np.array([fin - inicio for _, _, inicio, fin in limites], dtype=np.int64)
+
+        # Si los casos cubren el dataset de corrido basta un slice; si no, solo sus filas
+        inicios = [inicio for _, _, inicio, _ in limites]
+        fines = [fin for _, _, _, fin in limites]
+        if inicios == [0] + fines[:-1]:
+            filas = slice(0, fines[-1] if fines else 0)
+        else:
+            filas = np.concatenate([np.arange(inicio, fin) for inicio, fin in zip(inicios, fines)])
+        deuda = np.asarray(gen.columna('DEUDA_CON_MORA'), dtype=np.float64)[filas]
+
+        # El año sale de la tabla de valores; el código -1 (nulo) queda sin año
+        codigos_operacion, valores_operacion = gen.codigos_columna('OPERACION')
+        codigo_anio, anios_unicos = pd.factorize(_anios(valores_operacion))
+        codigo_anio = np.append(codigo_anio, -1).astype(np.int32)
+        anios = pd.Categorical.from_codes(codigo_anio[codigos_operacion[filas]], anios_unicos)
+        return casos, registros, deuda, anios
+
+    casos = []
+    registros = []
+    deudas = []
+    anios = []
+    for ruc in sorted(gen.obtener_rucs()):
+        for campana in gen.obtener_campanas_ruc(ruc):
+            datos = gen.filtrar_por_ruc_campana(ruc, campana)
+            razon = datos['RAZON_SOCIAL'].iat[0] if len(datos) else ''
+            casos.append((float(ruc), campana, razon if pd.notna(razon) else ''))
+            registros.append(len(datos))
+            deudas.append(datos['DEUDA_CON_MORA'].to_numpy(dtype=np.float64))
+            anios.append(_anios(datos['OPERACION']))
+
+    return (
+        casos,
+        np.array(registros, dtype=np.int64),
+        np.concatenate(deudas) if deudas else np.zeros(0),
+        pd.Categorical(np.concatenate(anios) if anios else []),
+    )
+
+
+def calcular_analitica(gen):
+    """
+    Calcula los agregados de cartera sobre todo el dataset
+
+    Args:
+        gen: Generador con la interfaz de GeneradorCache
+
+    Returns:
+        dict: DataFrames 'casos', 'resumen', 'deuda_por_anio' y 'distribucion'
+    """
+    casos, registros, deuda, anios = _datos_por_caso(gen)
+    caso_por_fila = np.repeat(np.arange(len(casos)), registros)
+
+    tabla_casos = pd.DataFrame({
+        'ruc': [ruc for ruc, _, _ in casos],
+        'campana': [campana for _, campana, _ in casos],
+        'razon_social': [str(razon) for _, _, razon in casos],
+        'registros': registros,
+        'deuda': np.bincount(caso_por_fila, weights=deuda, minlength=len(casos)),
+    })
+
+    resumen = tabla_casos.groupby('campana').agg(
+        casos=('ruc', 'size'),
+        rucs=('ruc', 'nunique'),
+        registros=('registros', 'sum'),
+        deuda=('deuda', 'sum'),
+    )
+
+    # Año y campaña por registro como categorías (códigos, no cadenas por fila)
+    codigos_campana, campanas = pd.factorize(tabla_casos['campana'])
+    deuda_por_anio = (
+        pd.DataFrame({
+            'campana': pd.Categorical.from_codes(codigos_campana[caso_por_fila], campanas),
+            'anio': anios,
+            'deuda': deuda,
+        })
+        .groupby(['anio', 'campana'], observed=True)['deuda'].sum()
+        .unstack('campana', fill_value=0.0)
+    )
+    deuda_por_anio.index = deuda_por_anio.index.astype(str)
+    deuda_por_anio.columns = deuda_por_anio.columns.astype(str)
+    deuda_por_anio = deuda_por_anio.sort_index().sort_index(axis=1)
+
+    distribucion = (
+        tabla_casos.assign(rango=pd.cut(tabla_casos['registros'], RANGOS_REGISTROS,
+                                        labels=ETIQUETAS_RANGOS))
+        .groupby(['rango', 'campana'], observed=False).size()
+        .unstack('campana', fill_value=0)
+    )
+
+    return {
+        'casos': tabla_casos.sort_values('deuda', ascending=False, ignore_index=True),
+        'resumen': resumen,
+        'deuda_por_anio': deuda_por_anio,
+        'distribucion': distribucion,
+    }
+
+
+def top_deudores(analitica, campana=None, n=20):
+    """
+    Casos con mayor deuda, opcionalmente de una campaña
+
+    Args:
+        analitica: Resultado de calcular_analitica
+        campana: Campaña a filtrar (None para todas)
+        n: Cantidad de casos
+
+    Returns:
+        DataFrame: Casos ordenados por deuda descendente
+    """
+    casos = analitica['casos']
+    if campana is not None:
+        casos = casos[casos['campana'] == campana]
+    return casos.head(n).reset_index(drop=True)
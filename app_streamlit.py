@@ -4,9 +4,10 @@ Interfaz web para generar liquidaciones en PDF
 """
 
 import streamlit as st
-import pandas as pd
 import sys
 import os
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Configuración de página
@@ -21,6 +22,22 @@ st.set_page_config(
 sys.path.insert(0, os.path.dirname(__file__))
 from generador_cache import GeneradorCache
 from generador_pdf import GeneradorPDF
+from calculos_liquidacion import agregados_por_periodo, filtrar_periodos, formatear_detalle
+from datos_compartidos import (VARIABLE_MODO_CARGA, obtener_generador_compartido,
+                               registros_datos, version_datos)
+from precarga_liquidaciones import PrecargaLiquidaciones
+from analitica import calcular_analitica, top_deudores
+import memoria
+
+# Filas por página en "Ver Datos"
+FILAS_POR_PAGINA = [50, 100, 250, 500]
+
+# Segundos máximos esperando un PDF precargado en curso antes de renderizar directo
+ESPERA_PRECARGA = 5
+
+# Vistas de la aplicación
+VISTA_GENERAR = "🔧 Generar Liquidación"
+VISTA_ANALITICA = "📈 Analítica de Cartera"
 
 # Estilos CSS personalizados
 st.markdown("""
@@ -80,9 +97,13 @@ def cargar_generador():
     status_text = st.empty()
     
     base_path = os.path.dirname(__file__)
+    modo_compartido = os.environ.get(VARIABLE_MODO_CARGA, "local") == "compartido"
     
     # Usar caché para carga rápida
-    if GeneradorCache.archivo_cache_existe():
+    if modo_compartido:
+        status_text.info("⏳ Conectando a datos compartidos...")
+        progress_bar.progress(50)
+    elif GeneradorCache.archivo_cache_existe():
         status_text.info("⏳ Cargando desde caché...")
         progress_bar.progress(50)
     else:
@@ -90,7 +111,12 @@ def cargar_generador():
         progress_bar.progress(25)
     
     try:
-        gen = GeneradorCache.obtener_generador(base_path)
+        with memoria.medir("carga_cache"):
+            if modo_compartido:
+                # Varios procesos de Streamlit leen una sola copia memory-mapped
+                gen = obtener_generador_compartido(base_path)
+            else:
+                gen = GeneradorCache.obtener_generador(base_path)
         progress_bar.progress(100)
         status_text.empty()
         progress_bar.empty()
@@ -104,6 +130,11 @@ def cargar_generador_pdf():
     """Carga el generador PDF"""
     return GeneradorPDF()
 
+@st.cache_resource
+def cargar_ejecutor_precarga():
+    """Hilos compartidos por todas las sesiones para la precarga de PDFs"""
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="precarga")
+
 # Cargar generadores con estado
 try:
     gen = cargar_generador()
@@ -112,10 +143,216 @@ except Exception as e:
     st.error(f"❌ Error al cargar sistema: {e}")
     st.stop()
 
+# En modo compartido, tomar la generación de datos vigente si fue actualizada
+if hasattr(gen, 'actualizar'):
+    gen.actualizar()
+version = version_datos(gen)
+
+# Precarga especulativa propia de cada sesión
+if 'precarga' not in st.session_state:
+    st.session_state.precarga = PrecargaLiquidaciones(cargar_ejecutor_precarga(), gen, gen_pdf)
+precarga = st.session_state.precarga
+
+@st.cache_data(max_entries=128, show_spinner=False)
+def obtener_agregados_caso(ruc, campana, version):
+    """Totales por período del caso (se calculan una vez por caso)"""
+    return agregados_por_periodo(gen.filtrar_por_ruc_campana(ruc, campana))
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def obtener_pagina_detalle(ruc, campana, version, periodos, pagina, filas_por_pagina, _datos):
+    """Página formateada del detalle; `_datos` queda determinado por el resto de la clave"""
+    inicio = pagina * filas_por_pagina
+    return formatear_detalle(_datos.iloc[inicio:inicio + filas_por_pagina])
+
+def confirmar_ruc_seleccionado():
+    """Recuerda el RUC elegido a mano entre varias coincidencias"""
+    st.session_state.ruc_elegido = st.session_state.ruc_select
+
+@st.cache_data(max_entries=2, show_spinner=False)
+def obtener_casos_por_campana(version, id_generador):
+    """Casos por campaña con una pasada sobre el índice de casos"""
+    return dict(sorted(Counter(campana for _, campana in gen.rucs_por_campana).items()))
+
+def alternar_detalle(caso):
+    """Abre o cierra el detalle de "Ver Datos" para el caso"""
+    if st.session_state.get('ver_datos_caso') == caso:
+        st.session_state.ver_datos_caso = None
+    else:
+        st.session_state.ver_datos_caso = caso
+
+# ============================================================================
+# BARRA LATERAL
+# ============================================================================
+
+def mostrar_barra_lateral():
+    """Información general; se muestra en todas las vistas"""
+    with st.sidebar:
+        st.markdown("## 📚 Información")
+        
+        st.markdown("### 🎯 Campañas Disponibles")
+        for campana, casos in obtener_casos_por_campana(version, id(gen)).items():
+            st.write(f"• **{campana}**: {casos} casos")
+        
+        st.markdown("---")
+        st.markdown("### 📊 Estadísticas")
+        st.write(f"• **RUCs únicos**: {len(gen.obtener_rucs())}")
+        st.write(f"• **Casos totales**: {len(gen.rucs_por_campana):,}")
+        num_registros_total = registros_datos(gen)
+        if num_registros_total is not None:
+            st.write(f"• **Registros**: {num_registros_total:,}")
+        
+        if memoria.esta_activa():
+            st.markdown("---")
+            st.markdown("### 🧠 Memoria")
+            rss = memoria.rss_actual()
+            if rss is not None:
+                st.write(f"• **RSS del proceso**: {rss / memoria.MB:.0f} MB")
+            for etiqueta in ("carga_cache", "busqueda_caso", "render_pdf"):
+                medicion = memoria.ultima_medicion(etiqueta)
+                if medicion is not None:
+                    st.caption(medicion.resumen())
+        
+        st.markdown("---")
+        st.markdown("### ℹ️ Acerca de")
+        st.info("""
+        **Sistema de Liquidaciones WorldTel v2.0**
+        
+        Aplicación web para generación rápida de liquidaciones en PDF.
+        
+        - Interfaz intuitiva
+        - Generación instantánea
+        - PDF descargable
+        - Multi-campaña
+        """)
+        
+        st.markdown("---")
+        st.markdown(f"*Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')}*")
+
+# ============================================================================
+# ANALÍTICA DE CARTERA
+# ============================================================================
+
+@st.cache_data(max_entries=2, show_spinner="⏳ Calculando agregados de cartera...")
+def obtener_analitica(version, id_generador):
+    """Agregados de cartera, calculados una vez por versión de datos"""
+    return calcular_analitica(gen)
+
+def ir_a_generar(ruc, campana):
+    """Abre el formulario de generación con el caso seleccionado"""
+    st.session_state.vista = VISTA_GENERAR
+    st.session_state.ruc_input = str(int(ruc))
+    st.session_state.campana_select = campana
+
+def mostrar_analitica():
+    """Vista de analítica por campaña con detalle por RUC"""
+    st.markdown("## 📈 Analítica de Cartera")
+    
+    analitica = obtener_analitica(version, id(gen))
+    resumen = analitica['resumen']
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Casos", f"{int(resumen['casos'].sum()):,}")
+    with col2:
+        st.metric("Registros", f"{int(resumen['registros'].sum()):,}")
+    with col3:
+        st.metric("Deuda total", f"S/. {resumen['deuda'].sum():,.2f}")
+    
+    st.dataframe(
+        resumen.reset_index(),
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "campana": "Campaña",
+            "casos": "Casos",
+            "rucs": "RUCs",
+            "registros": "Registros",
+            "deuda": st.column_config.NumberColumn("Deuda", format="S/. %.2f"),
+        }
+    )
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("### 📅 Deuda por año de período")
+        st.bar_chart(analitica['deuda_por_anio'])
+    with col2:
+        st.markdown("### 📦 Registros por caso")
+        st.bar_chart(analitica['distribucion'])
+    
+    # ===== TOP DEUDORES =====
+    st.markdown("---")
+    st.markdown("### 🏆 Top Deudores")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        campana_analitica = st.selectbox(
+            "Campaña:",
+            ["Todas"] + resumen.index.tolist(),
+            key="analitica_campana"
+        )
+    with col2:
+        cantidad = st.selectbox("Mostrar:", [10, 20, 50, 100], index=1, key="analitica_top")
+    
+    top = top_deudores(
+        analitica,
+        None if campana_analitica == "Todas" else campana_analitica,
+        cantidad
+    )
+    top_tabla = top.assign(ruc=top['ruc'].map(lambda r: str(int(r))))
+    st.dataframe(
+        top_tabla,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            "ruc": "RUC",
+            "campana": "Campaña",
+            "razon_social": "Razón Social",
+            "registros": "Registros",
+            "deuda": st.column_config.NumberColumn("Deuda", format="S/. %.2f"),
+        }
+    )
+    
+    if top.empty:
+        return
+    
+    # ===== DETALLE DEL CASO (usa el índice de casos del generador) =====
+    st.markdown("---")
+    st.markdown("### 🔎 Detalle del Caso")
+    
+    posicion = st.selectbox(
+        "Caso:",
+        range(len(top)),
+        format_func=lambda i: f"{top_tabla['ruc'][i]} - {top['campana'][i]} - {top['razon_social'][i]}",
+        key="analitica_caso"
+    )
+    ruc_caso = top['ruc'][posicion]
+    campana_caso = top['campana'][posicion]
+    agregados = obtener_agregados_caso(ruc_caso, campana_caso, version)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Registros", int(agregados['registros'].sum()))
+    with col2:
+        st.metric("Total Deuda", f"S/. {agregados['total_fondo'].sum():.2f}")
+    with col3:
+        st.metric("Campañas del RUC", len(gen.obtener_campanas_ruc(ruc_caso)))
+    
+    st.bar_chart(agregados['total_fondo'])
+    
+    st.button(
+        "🔧 Generar liquidación de este caso",
+        on_click=ir_a_generar,
+        args=(ruc_caso, campana_caso),
+        type="primary"
+    )
+
 # ============================================================================
 # INTERFAZ PRINCIPAL
 # ============================================================================
 
+with st.sidebar:
+    vista = st.radio("Vista:", [VISTA_GENERAR, VISTA_ANALITICA], key="vista")
+
 # Encabezado
 col1, col2 = st.columns([3, 1])
 with col1:
@@ -136,12 +373,17 @@ html_info = f"""
 <div class="header-info">
     <strong>📊 Sistema Operativo</strong><br>
     RUCs únicos: <strong>{len(gen.obtener_rucs())}</strong> | 
-    Casos totales: <strong>9,137</strong> | 
-    Campañas: <strong>4</strong>
+    Casos totales: <strong>{len(gen.rucs_por_campana):,}</strong> | 
+    Campañas: <strong>{len(obtener_casos_por_campana(version, id(gen)))}</strong>
 </div>
 """
 st.markdown(html_info, unsafe_allow_html=True)
 
+if vista == VISTA_ANALITICA:
+    mostrar_analitica()
+    mostrar_barra_lateral()
+    st.stop()
+
 # ============================================================================
 # FORMULARIO DE GENERACIÓN
 # ============================================================================
@@ -165,6 +407,7 @@ with col1:
     
     # Buscar RUC
     ruc_encontrado = None
+    ruc_confirmado = False
     campanas_disponibles = []
     
     if ruc_input:
@@ -174,18 +417,30 @@ with col1:
         if coincidencias:
             if len(coincidencias) == 1:
                 ruc_encontrado = float(coincidencias[0])
+                ruc_confirmado = True
                 campanas_disponibles = gen.obtener_campanas_ruc(ruc_encontrado)
             else:
                 st.warning(f"⚠️ {len(coincidencias)} coincidencias encontradas")
                 ruc_seleccionado = st.selectbox(
                     "Seleccione el RUC correcto:",
                     coincidencias,
-                    key="ruc_select"
+                    key="ruc_select",
+                    on_change=confirmar_ruc_seleccionado
                 )
                 ruc_encontrado = float(ruc_seleccionado)
+                # La primera coincidencia es solo el valor por defecto del selectbox
+                ruc_confirmado = st.session_state.get('ruc_elegido') == ruc_seleccionado
                 campanas_disponibles = gen.obtener_campanas_ruc(ruc_encontrado)
         else:
             st.error("❌ RUC no encontrado")
+    
+    # Renderizar en segundo plano la liquidación por defecto de cada campaña
+    # solo para un RUC inequívoco; si el usuario cambia de RUC o lo borra, se descarta
+    if ruc_confirmado and campanas_disponibles:
+        precarga.programar(ruc_encontrado, campanas_disponibles,
+                           datetime.now().strftime('%d/%m/%Y'), version)
+    else:
+        precarga.cancelar()
 
 with col2:
     st.markdown("### Seleccione Campaña")
@@ -206,9 +461,11 @@ if ruc_encontrado and campana_seleccionada:
     st.markdown("### 📋 Información del Deudor")
     
     try:
-        datos_ruc = gen.filtrar_por_ruc_campana(ruc_encontrado, campana_seleccionada)
+        with memoria.medir("busqueda_caso"):
+            datos_ruc = gen.filtrar_por_ruc_campana(ruc_encontrado, campana_seleccionada)
         razon_social = datos_ruc.iloc[0]['RAZON_SOCIAL']
-        total_deuda = datos_ruc['DEUDA_CON_MORA'].sum()
+        agregados = obtener_agregados_caso(ruc_encontrado, campana_seleccionada, version)
+        total_deuda = agregados['total_fondo'].sum()
         num_registros = len(datos_ruc)
         
         col1, col2, col3 = st.columns(3)
@@ -226,8 +483,8 @@ if ruc_encontrado and campana_seleccionada:
         st.markdown("---")
         st.markdown("### 📅 Seleccionar Períodos")
         
-        # Extraer períodos únicos del dataset
-        periodos_todos = sorted(datos_ruc['OPERACION'].apply(lambda x: str(x)[-6:]).unique())
+        # Períodos únicos del caso (índice de los agregados)
+        periodos_todos = agregados.index.tolist()
         
         # Opción: Todos o seleccionar específicos
         col1, col2 = st.columns([1, 3])
@@ -249,17 +506,11 @@ if ruc_encontrado and campana_seleccionada:
                     key="periodos_multiselect"
                 )
         
-        # Filtrar datos según períodos seleccionados
-        if periodos_seleccionados:
-            datos_ruc_filtrado = datos_ruc[
-                datos_ruc['OPERACION'].apply(lambda x: str(x)[-6:]).isin(periodos_seleccionados)
-            ]
-            total_deuda_filtrado = datos_ruc_filtrado['DEUDA_CON_MORA'].sum()
-            num_registros_filtrado = len(datos_ruc_filtrado)
-        else:
-            datos_ruc_filtrado = datos_ruc.copy()
-            total_deuda_filtrado = total_deuda
-            num_registros_filtrado = num_registros
+        # Filtrar datos según períodos seleccionados (sin selección se usan todos)
+        datos_ruc_filtrado = filtrar_periodos(datos_ruc, periodos_seleccionados)
+        agregados_filtrado = agregados.loc[periodos_seleccionados or periodos_todos]
+        total_deuda_filtrado = agregados_filtrado['total_fondo'].sum()
+        num_registros_filtrado = int(agregados_filtrado['registros'].sum())
         
         # Mostrar totales filtrados
         st.markdown("**Totales con filtro aplicado:**")
@@ -300,25 +551,41 @@ if ruc_encontrado and campana_seleccionada:
                 type="primary"
             )
         
+        # Ver datos: se mantiene abierto entre reruns mientras no cambie el caso
+        caso_actual = (ruc_encontrado, campana_seleccionada)
+        detalle_abierto = st.session_state.get('ver_datos_caso') == caso_actual
         with col2:
-            ver_datos = st.button(
-                "📊 Ver Datos",
-                use_container_width=True
+            st.button(
+                "🔼 Ocultar Datos" if detalle_abierto else "📊 Ver Datos",
+                use_container_width=True,
+                on_click=alternar_detalle,
+                args=(caso_actual,)
             )
         
         # Generar PDF
         if generar:
             with st.spinner("Generando PDF..."):
                 try:
-                    # Generar PDF con datos filtrados
-                    pdf_bytes = gen_pdf.generar_liquidacion_pdf(
-                        ruc=ruc_encontrado,
-                        campana=campana_seleccionada,
-                        razon_social=razon_social,
-                        datos_ruc=datos_ruc_filtrado,
-                        direccion=direccion,
-                        fecha_pago=fecha_pago.strftime('%d/%m/%Y')
-                    )
+                    pdf_bytes = None
+                    fecha_pago_str = fecha_pago.strftime('%d/%m/%Y')
+                    
+                    # Con las opciones por defecto se usa el PDF precargado
+                    if len(datos_ruc_filtrado) == num_registros and not direccion.strip():
+                        pdf_bytes = precarga.obtener(ruc_encontrado, campana_seleccionada,
+                                                     fecha_pago_str, version,
+                                                     timeout=ESPERA_PRECARGA)
+                    
+                    if pdf_bytes is None:
+                        # Generar PDF con datos filtrados
+                        with memoria.medir("render_pdf"):
+                            pdf_bytes = gen_pdf.generar_liquidacion_pdf(
+                                ruc=ruc_encontrado,
+                                campana=campana_seleccionada,
+                                razon_social=razon_social,
+                                datos_ruc=datos_ruc_filtrado,
+                                direccion=direccion,
+                                fecha_pago=fecha_pago_str
+                            )
                     
                     # Nombre del archivo
                     campana_abrev = campana_seleccionada.replace(" ", "_").upper()[:10]
@@ -347,51 +614,50 @@ if ruc_encontrado and campana_seleccionada:
                 except Exception as e:
                     st.error(f"❌ Error al generar PDF: {e}")
         
-        # Ver datos
-        if ver_datos:
+        if detalle_abierto:
             st.markdown("---")
             st.markdown("### 📊 Detalle de Deuda")
             
-            # Preparar datos para mostrar (usar datos filtrados)
-            datos_tabla = []
-            total_fondo_general = 0
-            total_mora_general = 0
-            total_admin_general = 0
-            
-            for idx, row in datos_ruc_filtrado.iterrows():
-                fondo = row['FONDO_NOMINAL']
-                admin = row['COMISION_NOMINAL']
-                mora = row.get('MORA', 0)
-                interes_admin = row['SEGURO_NOMINAL'] + row['AFP_NOMINAL']
-                total_admin_row = admin + interes_admin
-                deuda_con_mora = row['DEUDA_CON_MORA']
-                
-                # Obtener AFILIADO
-                afiliado = str(row.get('AFILIADO', '')) if 'AFILIADO' in row else ''
-                
-                # Extraer últimos 6 dígitos del período
-                periodo_completo = str(row['OPERACION'])
-                periodo = periodo_completo[-6:] if len(periodo_completo) >= 6 else periodo_completo
-                
-                datos_tabla.append({
-                    'CUSSP': row['CUSSP'],
-                    'Afiliado': afiliado,
-                    'Período': periodo,
-                    'Fondo': f"{fondo:.2f}",
-                    'Mora': f"{mora:.2f}",
-                    'Total Fondo': f"{deuda_con_mora:.2f}",
-                    'Total Admin': f"{total_admin_row:.2f}",
-                })
-                
-                total_fondo_general += deuda_con_mora
-                total_mora_general += mora
-                total_admin_general += total_admin_row
+            col1, col2, col3 = st.columns([1, 1, 2])
+            with col1:
+                filas_por_pagina = st.selectbox(
+                    "Filas por página:",
+                    FILAS_POR_PAGINA,
+                    key="filas_por_pagina"
+                )
+            num_paginas = max(1, -(-num_registros_filtrado // filas_por_pagina))
+            if st.session_state.get('pagina_detalle', 1) > num_paginas:
+                st.session_state.pagina_detalle = num_paginas
+            with col2:
+                pagina = st.number_input(
+                    "Página:",
+                    min_value=1,
+                    max_value=num_paginas,
+                    step=1,
+                    key="pagina_detalle"
+                )
+            with col3:
+                st.caption(f"{num_registros_filtrado} registros en {num_paginas} páginas")
             
-            df_datos = pd.DataFrame(datos_tabla)
+            # Solo se formatea la página visible (cacheada por caso y períodos)
+            df_datos = obtener_pagina_detalle(
+                ruc_encontrado,
+                campana_seleccionada,
+                version,
+                tuple(periodos_seleccionados),
+                int(pagina) - 1,
+                filas_por_pagina,
+                datos_ruc_filtrado
+            )
             
             # Mostrar tabla de datos
             st.dataframe(df_datos, use_container_width=True, hide_index=True)
             
+            # Totales desde los agregados por período
+            total_fondo_general = agregados_filtrado['total_fondo'].sum()
+            total_mora_general = agregados_filtrado['total_mora'].sum()
+            total_admin_general = agregados_filtrado['total_administradora'].sum()
+            
             # Mostrar fila de totales como texto grande y destacado
             col1, col2, col3, col4, col5, col6 = st.columns(6)
             with col1:
@@ -410,43 +676,4 @@ if ruc_encontrado and campana_seleccionada:
     except Exception as e:
         st.error(f"❌ Error: {e}")
 
-# ============================================================================
-# BARRA LATERAL
-# ============================================================================
-
-with st.sidebar:
-    st.markdown("## 📚 Información")
-    
-    st.markdown("### 🎯 Campañas Disponibles")
-    campanas = {
-        "PRESUNTA": "PRESUNTA",
-        "DEUDA REAL TOTAL": "DEUDA REAL TOTAL",
-        "REDIRECCIONAMIENTO": "REDIRECCIONAMIENTO",
-        "PREJUDICIAL FLUJO": "PREJUDICIAL FLUJO"
-    }
-    for campana in campanas.values():
-        casos = len([ruc for ruc in gen.obtener_rucs() if (ruc, campana) in gen.rucs_por_campana])
-        st.write(f"• **{campana}**: {casos} casos")
-    
-    st.markdown("---")
-    st.markdown("### 📊 Estadísticas")
-    st.write(f"• **RUCs únicos**: {len(gen.obtener_rucs())}")
-    st.write(f"• **Casos totales**: 9,137")
-    st.write(f"• **Registros**: 460,843")
-    st.write(f"• **Período**: 2008-2021")
-    
-    st.markdown("---")
-    st.markdown("### ℹ️ Acerca de")
-    st.info("""
-    **Sistema de Liquidaciones WorldTel v2.0**
-    
-    Aplicación web para generación rápida de liquidaciones en PDF.
-    
-    - Interfaz intuitiva
-    - Generación instantánea
-    - PDF descargable
-    - Multi-campaña
-    """)
-    
-    st.markdown("---")
-    st.markdown(f"*Actualizado: {datetime.now().strftime('%d/%m/%Y %H:%M')}*")
+mostrar_barra_lateral()
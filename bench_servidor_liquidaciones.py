@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de throughput del servicio HTTP de liquidaciones
+Levanta el servicio en localhost con datos sintéticos y lanza PDFs concurrentes.
+
+Uso:
+    python bench_servidor_liquidaciones.py --solicitudes 200 --clientes 8 --workers 4
+"""
+import argparse
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from datos_sinteticos import GeneradorSintetico
+from servidor_liquidaciones import crear_servidor
+
+
+def solicitar(url):
+    inicio = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=120) as respuesta:
+            respuesta.read()
+            estado = respuesta.status
+    except urllib.error.HTTPError as e:
+        estado = e.code
+    return estado, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del servicio de liquidaciones")
+    parser.add_argument("--solicitudes", type=int, default=200)
+    parser.add_argument("--clientes", type=int, default=8, help="Solicitudes concurrentes")
+    parser.add_argument("--workers", type=int, default=2, help="Procesos de render")
+    parser.add_argument("--pendientes", type=int, default=8)
+    parser.add_argument("--casos", type=int, default=40)
+    parser.add_argument("--filas", type=int, default=60, help="Registros por caso")
+    args = parser.parse_args()
+
+    gen = GeneradorSintetico(n_casos=args.casos, filas_por_caso=args.filas)
+    servidor = crear_servidor(gen, port=0, max_workers=args.workers,
+                              max_pendientes=args.pendientes)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    casos = list(gen.rucs_por_campana)
+    urls = [
+        f"{base}/liquidacion.pdf?ruc={int(ruc)}&campana={urllib.parse.quote(campana)}"
+        for ruc, campana in (casos[i % len(casos)] for i in range(args.solicitudes))
+    ]
+
+    try:
+        # Calentar los procesos del pool antes de medir
+        for url in urls[:args.workers]:
+            solicitar(url)
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clientes) as clientes:
+            resultados = list(clientes.map(solicitar, urls))
+        duracion = time.perf_counter() - inicio
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+        servidor.servicio.cerrar()
+
+    latencias = sorted(t for estado, t in resultados if estado == 200)
+    exitos = len(latencias)
+    rechazos = sum(1 for estado, _ in resultados if estado == 503)
+
+    print(f"Solicitudes: {len(resultados)} | Clientes: {args.clientes} | Workers: {args.workers}")
+    print(f"OK: {exitos} | 503: {rechazos} | Otros: {len(resultados) - exitos - rechazos}")
+    print(f"Duración: {duracion:.2f}s | Throughput: {exitos / duracion:.1f} PDF/s")
+    if latencias:
+        p50 = latencias[len(latencias) // 2]
+        p95 = latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))]
+        print(f"Latencia p50: {p50 * 1000:.0f} ms | p95: {p95 * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
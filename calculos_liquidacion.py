@@ -0,0 +1,122 @@
+"""
+Cálculos comunes de liquidación
+Períodos y totales compartidos entre la app web y el servicio HTTP
+"""
+
+import pandas as pd
+
+# Porcentajes aplicados en el resumen de la liquidación
+PORCENTAJE_GASTOS_COBRANZA = 0.15
+PORCENTAJE_IGV = 0.18
+
+
+def extraer_periodos(datos):
+    """Devuelve una Serie con el período YYYYMM (últimos 6 caracteres de OPERACION)"""
+    return datos['OPERACION'].astype(str).str[-6:]
+
+
+def filtrar_periodos(datos, periodos):
+    """
+    Filtra los registros de un caso por período
+
+    Args:
+        datos: DataFrame del caso (RUC + campaña)
+        periodos: Lista de períodos YYYYMM; vacía o None conserva todos
+
+    Returns:
+        DataFrame: Registros de los períodos seleccionados
+    """
+    if not periodos:
+        return datos
+    return datos[extraer_periodos(datos).isin(periodos)]
+
+
+def calcular_totales(datos):
+    """
+    Calcula los totales de un caso con la misma lógica que el PDF
+
+    Los registros con total de administradora en 0 no se incluyen en la
+    liquidación, igual que en GeneradorPDF.
+
+    Args:
+        datos: DataFrame del caso (RUC + campaña)
+
+    Returns:
+        dict: Totales del detalle y resumen de gastos
+    """
+    ceros = pd.Series(0.0, index=datos.index)
+    deuda = datos['DEUDA_CON_MORA'] if 'DEUDA_CON_MORA' in datos else datos['TOTA_FONDO']
+    mora = datos['MORA'] if 'MORA' in datos else ceros
+    admin = datos['COMISION_NOMINAL'] + datos['SEGURO_NOMINAL'] + datos['AFP_NOMINAL']
+
+    liquidables = admin != 0
+    total_fondo = float(deuda[liquidables].sum())
+    gastos_cobranza = total_fondo * PORCENTAJE_GASTOS_COBRANZA
+    igv = gastos_cobranza * PORCENTAJE_IGV
+    total_gastos = gastos_cobranza + igv
+
+    return {
+        'registros': int(len(datos)),
+        'deuda_total': float(deuda.sum()),
+        'registros_liquidados': int(liquidables.sum()),
+        'total_fondo': total_fondo,
+        'total_mora': float(mora[liquidables].sum()),
+        'total_administradora': float(admin[liquidables].sum()),
+        'gastos_cobranza': gastos_cobranza,
+        'igv': igv,
+        'total_gastos': total_gastos,
+        'total_deuda': total_fondo + total_gastos,
+    }
+
+
+def agregados_por_periodo(datos):
+    """
+    Agrega los registros de un caso por período
+
+    Permite obtener totales de cualquier selección de períodos sin recorrer
+    todos los registros del caso.
+
+    Args:
+        datos: DataFrame del caso (RUC + campaña)
+
+    Returns:
+        DataFrame: Indexado por período con registros, fondo, mora y admin
+    """
+    mora = datos['MORA'] if 'MORA' in datos else pd.Series(0.0, index=datos.index)
+    agregados = pd.DataFrame({
+        'periodo': extraer_periodos(datos),
+        'registros': 1,
+        'total_fondo': datos['DEUDA_CON_MORA'],
+        'total_mora': mora,
+        'total_administradora': (datos['COMISION_NOMINAL'] + datos['SEGURO_NOMINAL']
+                                 + datos['AFP_NOMINAL']),
+    })
+    return agregados.groupby('periodo').sum().sort_index()
+
+
+def formatear_detalle(datos):
+    """
+    Da formato de tabla al detalle de deuda ("Ver Datos")
+
+    Args:
+        datos: DataFrame con los registros a mostrar (una página)
+
+    Returns:
+        DataFrame: Columnas formateadas como texto
+    """
+    vacio = pd.Series('', index=datos.index)
+    mora = datos['MORA'] if 'MORA' in datos else pd.Series(0.0, index=datos.index)
+    admin = datos['COMISION_NOMINAL'] + datos['SEGURO_NOMINAL'] + datos['AFP_NOMINAL']
+
+    def formato(serie):
+        return serie.map('{:.2f}'.format)
+
+    return pd.DataFrame({
+        'CUSSP': datos['CUSSP'],
+        'Afiliado': datos['AFILIADO'].astype(str) if 'AFILIADO' in datos else vacio,
+        'Período': extraer_periodos(datos),
+        'Fondo': formato(datos['FONDO_NOMINAL']),
+        'Mora': formato(mora),
+        'Total Fondo': formato(datos['DEUDA_CON_MORA']),
+        'Total Admin': formato(admin),
+    }).reset_index(drop=True)
@@ -0,0 +1,371 @@
+"""
+Datos compartidos entre procesos
+Un proceso publica el dataset consolidado en archivos memory-mapped y los demás
+procesos del mismo servidor se conectan en solo lectura, sin copiar los datos.
+
+Estructura en disco:
+    DATOS_COMPARTIDOS/
+        ACTUAL                  -> nombre de la generación vigente
+        gen_<marca>/meta.json   -> columnas, tipos y número de filas
+        gen_<marca>/*.npy       -> arrays por columna e índice de casos
+
+Cada publicación escribe una generación nueva y recién al final reemplaza
+ACTUAL con os.replace, por lo que una actualización de datos es atómica.
+
+Uso:
+    python datos_compartidos.py --publicar
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+CARPETA_COMPARTIDA = "DATOS_COMPARTIDOS"
+ARCHIVO_ACTUAL = "ACTUAL"
+ARCHIVO_BLOQUEO = "PUBLICANDO.lock"
+GENERACIONES_CONSERVADAS = 2
+
+# Modo de carga para app_streamlit.py: "local" (por defecto) o "compartido"
+VARIABLE_MODO_CARGA = "LIQUIDACIONES_MODO_CARGA"
+
+
+def version_datos(gen):
+    """Versión de los datos del generador (None si no maneja versiones)"""
+    return getattr(gen, 'version', None)
+
+
+def registros_datos(gen):
+    """Total de registros si el generador lo conoce sin recorrer los casos (o None)"""
+    return getattr(gen, 'num_registros', None)
+
+
+def consolidar_casos(gen):
+    """
+    Une los registros de todos los casos en un solo DataFrame ordenado por caso
+
+    Args:
+        gen: Generador con la interfaz de GeneradorCache
+
+    Returns:
+        tuple: (DataFrame consolidado, lista de (ruc, campana, inicio, fin))
+    """
+    partes = []
+    casos = []
+    inicio = 0
+    for ruc in sorted(gen.obtener_rucs()):
+        for campana in gen.obtener_campanas_ruc(ruc):
+            datos = gen.filtrar_por_ruc_campana(ruc, campana)
+            partes.append(datos)
+            casos.append((float(ruc), campana, inicio, inicio + len(datos)))
+            inicio += len(datos)
+
+    consolidado = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    return consolidado, casos
+
+
+def _ruta_actual(directorio):
+    ruta = os.path.join(directorio, ARCHIVO_ACTUAL)
+    if not os.path.exists(ruta):
+        return None
+    with open(ruta, encoding='utf-8') as f:
+        generacion = f.read().strip()
+    return generacion or None
+
+
+def publicar(gen, directorio):
+    """
+    Publica el dataset del generador como una nueva generación compartida
+
+    Las columnas numéricas se guardan tal cual y las de fecha como int64; las
+    de texto se codifican como códigos enteros más un diccionario de valores
+    para no repetir cadenas.
+
+    Args:
+        gen: Generador con la interfaz de GeneradorCache
+        directorio: Carpeta de datos compartidos
+
+    Returns:
+        str: Nombre de la generación publicada
+    """
+    os.makedirs(directorio, exist_ok=True)
+    consolidado, casos = consolidar_casos(gen)
+
+    generacion = f"gen_{time.time_ns()}_{os.getpid()}"
+    destino = os.path.join(directorio, generacion)
+    temporal = destino + ".tmp"
+    os.makedirs(temporal)
+
+    columnas = []
+    for i, columna in enumerate(consolidado.columns):
+        serie = consolidado[columna]
+        archivo = f"col_{i}"
+        meta_columna = {'nombre': columna, 'archivo': archivo}
+        if serie.dtype.kind in 'biuf':
+            if serie.hasnans and serie.dtype.kind != 'f':
+                # Enteros o booleanos con nulos (Int64, boolean) no tienen NA en numpy
+                datos = serie.to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                datos = serie.to_numpy()
+            meta_columna['tipo'] = 'numerica'
+        elif serie.dtype.kind in 'Mm':
+            # Fechas y duraciones como int64 (NaT incluido) más el dtype para decodificarlas
+            zona = getattr(serie.dtype, 'tz', None)
+            if zona is not None:
+                serie = serie.dt.tz_convert('UTC').dt.tz_localize(None)
+            fechas = serie.to_numpy()
+            datos = fechas.view(np.int64)
+            meta_columna.update(tipo='fecha', dtype=fechas.dtype.str,
+                                zona=str(zona) if zona is not None else None)
+        else:
+            # Los nulos quedan con código -1 y se decodifican como NaN
+            codigos, valores = pd.factorize(serie.map(str, na_action='ignore'))
+            datos = codigos.astype(np.int32)
+            np.save(os.path.join(temporal, f"{archivo}_valores.npy"),
+                    np.asarray(valores, dtype=str))
+            meta_columna.update(tipo='texto', nulos=bool((codigos < 0).any()))
+        np.save(os.path.join(temporal, f"{archivo}.npy"), datos)
+        columnas.append(meta_columna)
+
+    np.save(os.path.join(temporal, "casos_ruc.npy"),
+            np.array([c[0] for c in casos], dtype=np.float64))
+    np.save(os.path.join(temporal, "casos_campana.npy"),
+            np.array([c[1] for c in casos], dtype=str))
+    np.save(os.path.join(temporal, "casos_limites.npy"),
+            np.array([(c[2], c[3]) for c in casos], dtype=np.int64).reshape(-1, 2))
+
+    with open(os.path.join(temporal, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({
+            'generacion': generacion,
+            'filas': int(len(consolidado)),
+            'casos': len(casos),
+            'columnas': columnas,
+        }, f, ensure_ascii=False)
+
+    # La generación solo se vuelve visible cuando está completa
+    os.rename(temporal, destino)
+    puntero = os.path.join(directorio, ARCHIVO_ACTUAL + ".tmp")
+    with open(puntero, 'w', encoding='utf-8') as f:
+        f.write(generacion)
+    os.replace(puntero, os.path.join(directorio, ARCHIVO_ACTUAL))
+
+    _limpiar_generaciones(directorio, generacion)
+    return generacion
+
+
+def _limpiar_generaciones(directorio, vigente):
+    """Elimina generaciones antiguas; las que siguen abiertas se dejan para después"""
+    generaciones = sorted(
+        nombre for nombre in os.listdir(directorio)
+        if nombre.startswith("gen_") and not nombre.endswith(".tmp") and nombre != vigente
+    )
+    antiguas = generaciones[:max(0, len(generaciones) - (GENERACIONES_CONSERVADAS - 1))]
+    for nombre in antiguas:
+        # En Windows un archivo mapeado no se puede borrar; se reintenta en la próxima publicación
+        shutil.rmtree(os.path.join(directorio, nombre), ignore_errors=True)
+
+
+class _Generacion:
+    """Arrays e índice de casos de una generación publicada"""
+
+    def __init__(self, directorio, nombre):
+        ruta = os.path.join(directorio, nombre)
+        with open(os.path.join(ruta, "meta.json"), encoding='utf-8') as f:
+            meta = json.load(f)
+
+        self.nombre = nombre
+        self.filas = meta['filas']
+        self.columnas = {}
+        for columna in meta['columnas']:
+            datos = np.load(os.path.join(ruta, f"{columna['archivo']}.npy"), mmap_mode='r')
+            valores = None
+            if columna['tipo'] == 'texto':
+                valores = np.load(os.path.join(ruta, f"{columna['archivo']}_valores.npy"),
+                                  mmap_mode='r')
+            self.columnas[columna['nombre']] = (columna, datos, valores)
+
+        casos_ruc = np.load(os.path.join(ruta, "casos_ruc.npy"))
+        casos_campana = np.load(os.path.join(ruta, "casos_campana.npy"))
+        casos_limites = np.load(os.path.join(ruta, "casos_limites.npy"))
+
+        self.casos = {}
+        self.campanas_por_ruc = {}
+        for ruc, campana, (inicio, fin) in zip(casos_ruc.tolist(), casos_campana.tolist(),
+                                                casos_limites.tolist()):
+            self.casos[(ruc, campana)] = (inicio, fin)
+            self.campanas_por_ruc.setdefault(ruc, []).append(campana)
+        self.rucs = sorted(self.campanas_por_ruc)
+
+
+class GeneradorCompartido:
+    """
+    Generador en solo lectura sobre una generación publicada
+
+    Ofrece la misma interfaz que GeneradorCache (obtener_rucs,
+    obtener_campanas_ruc, filtrar_por_ruc_campana, rucs_por_campana).
+    La generación se reemplaza con una sola asignación, por lo que una
+    consulta concurrente nunca mezcla datos de dos generaciones.
+    """
+
+    def __init__(self, directorio):
+        self.directorio = directorio
+        generacion = _ruta_actual(directorio)
+        if generacion is None:
+            raise FileNotFoundError(f"No hay datos publicados en {directorio}")
+        self._generacion = _Generacion(directorio, generacion)
+
+    @property
+    def version(self):
+        """Nombre de la generación conectada"""
+        return self._generacion.nombre
+
+    @property
+    def num_registros(self):
+        """Total de registros de la generación"""
+        return self._generacion.filas
+
+    @property
+    def rucs_por_campana(self):
+        """Índice de casos: (ruc, campana) -> (inicio, fin) en los arrays"""
+        return self._generacion.casos
+
+    def actualizar(self):
+        """
+        Se conecta a la generación vigente si cambió
+
+        Returns:
+            bool: True si se cambió de generación
+        """
+        generacion = _ruta_actual(self.directorio)
+        if generacion is None or generacion == self.version:
+            return False
+        self._generacion = _Generacion(self.directorio, generacion)
+        return True
+
+    def obtener_rucs(self):
+        """Lista de RUCs disponibles"""
+        return self._generacion.rucs
+
+    def obtener_campanas_ruc(self, ruc):
+        """Campañas en las que aparece el RUC"""
+        return list(self._generacion.campanas_por_ruc.get(float(ruc), []))
+
+    def columna(self, nombre, inicio=None, fin=None):
+        """Valores de una columna (decodificados si es de texto) en el rango dado"""
+        return self._leer_columna(self._generacion, nombre, inicio, fin)
+
+    def codigos_columna(self, nombre):
+        """
+        Códigos y tabla de valores de una columna de texto, sin decodificar
+
+        Returns:
+            tuple: (códigos memory-mapped, valores); el código -1 es un nulo
+        """
+        meta, datos, valores = self._generacion.columnas[nombre]
+        if meta['tipo'] != 'texto':
+            raise ValueError(f"La columna {nombre} no es de texto")
+        return datos, valores
+
+    @staticmethod
+    def _leer_columna(generacion, nombre, inicio, fin):
+        meta, datos, valores = generacion.columnas[nombre]
+        datos = datos[inicio:fin]
+        if meta['tipo'] == 'fecha':
+            fechas = datos.view(np.dtype(meta['dtype']))
+            if meta['zona']:
+                return pd.DatetimeIndex(fechas).tz_localize('UTC').tz_convert(meta['zona'])
+            return fechas
+        if meta['tipo'] == 'texto':
+            if not meta['nulos']:
+                return valores[datos]
+            decodificados = np.full(len(datos), np.nan, dtype=object)
+            validos = datos >= 0
+            decodificados[validos] = valores[datos[validos]]
+            return decodificados
+        return datos
+
+    def filtrar_por_ruc_campana(self, ruc, campana):
+        """Registros del caso RUC + campaña"""
+        generacion = self._generacion
+        inicio, fin = generacion.casos[(float(ruc), campana)]
+        return pd.DataFrame({
+            nombre: self._leer_columna(generacion, nombre, inicio, fin)
+            for nombre in generacion.columnas
+        })
+
+
+def obtener_generador_compartido(base_path, espera_max=600):
+    """
+    Se conecta a los datos compartidos, publicándolos si nadie lo hizo aún
+
+    Solo un proceso publica (archivo de bloqueo); el resto espera la
+    generación y se conecta en solo lectura.
+
+    Args:
+        base_path: Carpeta del proyecto
+        espera_max: Segundos máximos esperando a otro proceso que publica
+
+    Returns:
+        GeneradorCompartido: Generador conectado a la generación vigente
+    """
+    directorio = os.path.join(base_path, CARPETA_COMPARTIDA)
+    os.makedirs(directorio, exist_ok=True)
+    bloqueo = os.path.join(directorio, ARCHIVO_BLOQUEO)
+    limite = time.time() + espera_max
+
+    while _ruta_actual(directorio) is None:
+        try:
+            fd = os.open(bloqueo, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            try:
+                # Bloqueo abandonado por un proceso que terminó a mitad de la publicación
+                if time.time() - os.path.getmtime(bloqueo) > espera_max:
+                    os.remove(bloqueo)
+                    continue
+            except FileNotFoundError:
+                continue
+            if time.time() > limite:
+                raise TimeoutError("Tiempo de espera agotado esperando datos compartidos")
+            time.sleep(1)
+            continue
+
+        try:
+            os.close(fd)
+            if _ruta_actual(directorio) is None:
+                from generador_cache import GeneradorCache
+                publicar(GeneradorCache.obtener_generador(base_path), directorio)
+        finally:
+            os.remove(bloqueo)
+
+    return GeneradorCompartido(directorio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publica los datos compartidos entre procesos")
+    parser.add_argument("--publicar", action="store_true",
+                        help="Publica una generación nueva desde GeneradorCache")
+    args = parser.parse_args()
+
+    base_path = os.path.dirname(os.path.abspath(__file__))
+    directorio = os.path.join(base_path, CARPETA_COMPARTIDA)
+
+    if args.publicar:
+        sys.path.insert(0, base_path)
+        from generador_cache import GeneradorCache
+
+        print("⏳ Cargando datos...")
+        gen = GeneradorCache.obtener_generador(base_path)
+        print("⏳ Publicando generación...")
+        generacion = publicar(gen, directorio)
+        print(f"✓ Generación vigente: {generacion}")
+    else:
+        print(f"Generación vigente: {_ruta_actual(directorio) or 'ninguna'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Datos sintéticos de liquidaciones
+Generador en memoria con la misma interfaz que GeneradorCache, para pruebas y benchmarks
+"""
+
+import numpy as np
+import pandas as pd
+
+CAMPANAS = ["PRESUNTA", "DEUDA REAL TOTAL", "REDIRECCIONAMIENTO", "PREJUDICIAL FLUJO"]
+
+
+def generar_datos_caso(n_filas, semilla=0, razon_social="EMPRESA DE PRUEBA S.A.C."):
+    """
+    Genera un DataFrame con las columnas de un caso real
+
+    Args:
+        n_filas: Cantidad de registros del caso
+        semilla: Semilla del generador aleatorio
+        razon_social: Razón social del deudor
+
+    Returns:
+        DataFrame: Registros del caso
+    """
+    rng = np.random.default_rng(semilla)
+    anios = rng.integers(2008, 2022, n_filas)
+    meses = rng.integers(1, 13, n_filas)
+    fondo = rng.uniform(10, 500, n_filas).round(2)
+    comision = (fondo * 0.1).round(2)
+    mora = (fondo * rng.uniform(0, 2, n_filas)).round(2)
+
+    return pd.DataFrame({
+        'RAZON_SOCIAL': razon_social,
+        'CUSSP': [f"{rng.integers(100000, 999999)}ABCDE{i % 10}" for i in range(n_filas)],
+        'AFILIADO': [f"AFILIADO DE PRUEBA {i}" for i in range(n_filas)],
+        'OPERACION': [f"{anio}{mes:02d}" for anio, mes in zip(anios, meses)],
+        'FONDO_NOMINAL': fondo,
+        'COMISION_NOMINAL': comision,
+        'SEGURO_NOMINAL': 0.0,
+        'AFP_NOMINAL': 0.0,
+        'TOTA_FONDO': fondo + mora,
+        'DEUDA_CON_MORA': fondo + mora,
+        'MORA': mora,
+    })
+
+
+class GeneradorSintetico:
+    """Generador en memoria compatible con la interfaz de GeneradorCache"""
+
+    def __init__(self, n_casos=20, filas_por_caso=50, semilla=0):
+        self.rucs_por_campana = {}
+        for i in range(n_casos):
+            ruc = float(20100000000 + i)
+            campana = CAMPANAS[i % len(CAMPANAS)]
+            self.rucs_por_campana[(ruc, campana)] = generar_datos_caso(
+                filas_por_caso, semilla=semilla + i,
+                razon_social=f"EMPRESA SINTETICA {i} S.A.C."
+            )
+        self.num_registros = n_casos * filas_por_caso
+
+    def obtener_rucs(self):
+        """Lista de RUCs disponibles"""
+        return sorted({ruc for ruc, _ in self.rucs_por_campana})
+
+    def obtener_campanas_ruc(self, ruc):
+        """Campañas en las que aparece el RUC"""
+        return [campana for r, campana in self.rucs_por_campana if r == ruc]
+
+    def filtrar_por_ruc_campana(self, ruc, campana):
+        """Registros del caso RUC + campaña"""
+        return self.rucs_por_campana[(ruc, campana)]
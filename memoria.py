@@ -0,0 +1,197 @@
+"""
+Medición de memoria
+Contabiliza memoria de Python (tracemalloc) y RSS del proceso en la carga de
+caché, la búsqueda de casos y el render de PDF.
+
+La medición se activa con LIQUIDACIONES_MEDIR_MEMORIA=1 (o activar()), porque
+tracemalloc agrega costo a cada asignación. tracemalloc y el RSS son globales
+al proceso, por eso con la medición activa las secciones medidas con medir()
+se ejecutan de a una: una búsqueda espera a que termine el render de la
+precarga en lugar de sumar sus asignaciones. Las asignaciones de otros hilos
+fuera de una sección medida (por ejemplo, otra sesión dibujando su página)
+todavía pueden aparecer en la medición.
+"""
+
+import os
+import threading
+import time
+import tracemalloc
+from collections import deque
+from contextlib import contextmanager
+
+VARIABLE_MEDICION = "LIQUIDACIONES_MEDIR_MEMORIA"
+MB = 1024 * 1024
+
+# Mediciones recientes por etiqueta (carga_cache, busqueda_caso, render_pdf)
+HISTORIAL_MAXIMO = 100
+_historial = {}
+_lock = threading.Lock()
+
+# Serializa las secciones medidas con medir() (reentrante para mediciones anidadas)
+_lock_medicion = threading.RLock()
+
+# tracemalloc es global al proceso: se detiene cuando termina la última medición
+_lock_traza = threading.Lock()
+_trazas_en_curso = 0
+_traza_propia = False
+
+_activa = os.environ.get(VARIABLE_MEDICION, "0") == "1"
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def rss_actual():
+    """RSS actual del proceso en bytes (None si no se puede obtener)"""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        # Linux sin psutil: segunda columna de statm, en páginas
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class MedicionMemoria:
+    """Resultado de una medición; los valores están en bytes"""
+
+    def __init__(self, etiqueta):
+        self.etiqueta = etiqueta
+        self.pico = 0
+        self.retenido = 0
+        self.rss_inicial = None
+        self.rss_final = None
+        self.rss_pico = None
+        self.duracion = 0.0
+
+    @property
+    def pico_mb(self):
+        return self.pico / MB
+
+    @property
+    def retenido_mb(self):
+        return self.retenido / MB
+
+    @property
+    def rss_crecimiento_mb(self):
+        if self.rss_inicial is None or self.rss_final is None:
+            return None
+        return (self.rss_final - self.rss_inicial) / MB
+
+    def resumen(self):
+        """Texto corto para mostrar en la app o en logs"""
+        texto = (f"{self.etiqueta}: pico {self.pico_mb:.1f} MB, "
+                 f"retenido {self.retenido_mb:.1f} MB, {self.duracion:.2f}s")
+        if self.rss_pico is not None:
+            texto += f", RSS pico {self.rss_pico / MB:.0f} MB"
+        return texto
+
+
+class MedidorMemoria:
+    """
+    Mide pico y memoria retenida de un bloque con tracemalloc y muestreo de RSS
+
+    Uso:
+        with MedidorMemoria("render_pdf") as medicion:
+            ...
+        medicion.pico_mb, medicion.retenido_mb
+    """
+
+    def __init__(self, etiqueta, intervalo_rss=0.05):
+        self.medicion = MedicionMemoria(etiqueta)
+        self.intervalo_rss = intervalo_rss
+        self._detener = threading.Event()
+        self._muestreo = None
+
+    def _muestrear_rss(self):
+        while not self._detener.wait(self.intervalo_rss):
+            rss = rss_actual()
+            if rss is not None:
+                self.medicion.rss_pico = max(self.medicion.rss_pico or 0, rss)
+
+    def __enter__(self):
+        global _trazas_en_curso, _traza_propia
+        with _lock_traza:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                _traza_propia = True
+            _trazas_en_curso += 1
+        tracemalloc.reset_peak()
+        self._actual_inicial = tracemalloc.get_traced_memory()[0]
+
+        self.medicion.rss_inicial = self.medicion.rss_pico = rss_actual()
+        if self.medicion.rss_inicial is not None:
+            self._muestreo = threading.Thread(target=self._muestrear_rss, daemon=True)
+            self._muestreo.start()
+        self._t0 = time.perf_counter()
+        return self.medicion
+
+    def __exit__(self, *exc):
+        global _trazas_en_curso, _traza_propia
+        self.medicion.duracion = time.perf_counter() - self._t0
+        actual, pico = tracemalloc.get_traced_memory()
+        self.medicion.pico = max(0, pico - self._actual_inicial)
+        self.medicion.retenido = actual - self._actual_inicial
+
+        if self._muestreo is not None:
+            self._detener.set()
+            self._muestreo.join()
+            self.medicion.rss_final = rss_actual()
+            if self.medicion.rss_final is not None:
+                self.medicion.rss_pico = max(self.medicion.rss_pico, self.medicion.rss_final)
+
+        with _lock_traza:
+            _trazas_en_curso -= 1
+            if _trazas_en_curso == 0 and _traza_propia:
+                tracemalloc.stop()
+                _traza_propia = False
+        return False
+
+
+def activar(activa=True):
+    """Activa o desactiva la medición integrada"""
+    global _activa
+    _activa = activa
+
+
+def esta_activa():
+    return _activa
+
+
+@contextmanager
+def medir(etiqueta):
+    """
+    Mide el bloque y guarda el resultado en el historial si la medición está activa
+
+    Con la medición activa, el bloque espera a que termine cualquier otra
+    sección medida del proceso, para que las mediciones no se superpongan.
+
+    Yields:
+        MedicionMemoria | None: None cuando la medición está desactivada
+    """
+    if not _activa:
+        yield None
+        return
+
+    with _lock_medicion:
+        with MedidorMemoria(etiqueta) as medicion:
+            yield medicion
+    with _lock:
+        _historial.setdefault(etiqueta, deque(maxlen=HISTORIAL_MAXIMO)).append(medicion)
+
+
+def historial(etiqueta=None):
+    """Mediciones registradas (todas o de una etiqueta)"""
+    with _lock:
+        if etiqueta is not None:
+            return list(_historial.get(etiqueta, []))
+        return {clave: list(valores) for clave, valores in _historial.items()}
+
+
+def ultima_medicion(etiqueta):
+    """Última medición de una etiqueta (None si no hay)"""
+    mediciones = historial(etiqueta)
+    return mediciones[-1] if mediciones else None
@@ -0,0 +1,110 @@
+"""
+Precarga especulativa de liquidaciones
+Apenas se resuelve un RUC se renderiza en segundo plano la liquidación por
+defecto (todos los períodos, sin dirección, fecha de hoy) de cada campaña,
+para que "Generar PDF" se sirva desde el resultado ya calculado.
+"""
+
+import threading
+from concurrent.futures import CancelledError, TimeoutError as FuturesTimeoutError
+
+import memoria
+
+
+class PrecargaLiquidaciones:
+    """
+    Precarga por sesión sobre un ejecutor compartido
+
+    Al cambiar de RUC (o de versión de datos) se cancelan los trabajos
+    pendientes. Un trabajo que ya cargó su caso no se puede interrumpir:
+    el render termina y su resultado se descarta.
+    """
+
+    def __init__(self, ejecutor, gen, gen_pdf):
+        self.ejecutor = ejecutor
+        self.gen = gen
+        self.gen_pdf = gen_pdf
+        self._clave = None
+        self._futures = {}
+        self._cancelado = threading.Event()
+
+    def programar(self, ruc, campanas, fecha_pago, version=None):
+        """
+        Inicia el render por defecto de cada campaña del RUC
+
+        Si ya hay una precarga para el mismo RUC, fecha y versión no hace nada.
+
+        Args:
+            ruc: RUC resuelto
+            campanas: Campañas del RUC
+            fecha_pago: Fecha de pago por defecto (dd/mm/aaaa)
+            version: Versión de los datos
+        """
+        clave = (ruc, tuple(campanas), fecha_pago, version)
+        if clave == self._clave:
+            return
+
+        self.cancelar()
+        self._clave = clave
+        cancelado = self._cancelado = threading.Event()
+        self._futures = {
+            campana: self.ejecutor.submit(self._renderizar, ruc, campana, fecha_pago, cancelado)
+            for campana in campanas
+        }
+
+    def cancelar(self):
+        """Descarta la precarga actual"""
+        self._cancelado.set()
+        for future in self._futures.values():
+            future.cancel()
+        self._futures = {}
+        self._clave = None
+
+    def _renderizar(self, ruc, campana, fecha_pago, cancelado):
+        if cancelado.is_set():
+            return None
+        datos = self.gen.filtrar_por_ruc_campana(ruc, campana)
+        if cancelado.is_set() or len(datos) == 0:
+            return None
+        with memoria.medir("render_pdf"):
+            return self.gen_pdf.generar_liquidacion_pdf(
+                ruc=ruc,
+                campana=campana,
+                razon_social=datos.iloc[0]['RAZON_SOCIAL'],
+                datos_ruc=datos,
+                direccion="",
+                fecha_pago=fecha_pago,
+            )
+
+    def obtener(self, ruc, campana, fecha_pago, version=None, timeout=None):
+        """
+        Devuelve el PDF precargado si coincide con la solicitud
+
+        Si el render ya está en curso se espera su resultado hasta `timeout`
+        segundos en lugar de iniciar uno nuevo. Si todavía está en cola (detrás
+        de otras sesiones en el ejecutor compartido) se cancela y conviene
+        renderizar directamente.
+
+        Args:
+            timeout: Segundos máximos esperando un render en curso (None sin límite)
+
+        Returns:
+            bytes | None: PDF precargado, o None si no hay uno válido
+        """
+        if self._clave is None:
+            return None
+        ruc_precarga, _, fecha_precarga, version_precarga = self._clave
+        future = self._futures.get(campana)
+        if (future is None or ruc_precarga != ruc or fecha_precarga != fecha_pago
+                or version_precarga != version):
+            return None
+        if not (future.done() or future.running()):
+            future.cancel()
+            return None
+        try:
+            return future.result(timeout=timeout)
+        except (CancelledError, FuturesTimeoutError):
+            return None
+        except Exception:
+            # Si la precarga falló, el render normal mostrará el error
+            return None
@@ -0,0 +1,313 @@
+"""
+Servicio HTTP de liquidaciones
+Expone consulta de casos, totales y PDF para otros sistemas (discador, CRM)
+sin pasar por el formulario de Streamlit.
+
+Endpoints:
+    GET /salud
+    GET /casos/<ruc>
+    GET /totales?ruc=...&campana=...&periodos=200901,200902
+    GET /liquidacion.pdf?ruc=...&campana=...&periodos=...&fecha_pago=dd/mm/aaaa&direccion=...
+
+Uso:
+    python servidor_liquidaciones.py --port 8502 --workers 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+from concurrent.futures import (CancelledError, ProcessPoolExecutor,
+                                TimeoutError as FuturesTimeoutError)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+sys.path.insert(0, os.path.dirname(__file__))
+from calculos_liquidacion import calcular_totales, extraer_periodos, filtrar_periodos
+from generador_pdf import GeneradorPDF
+
+# Generador PDF propio de cada proceso del pool
+_generador_pdf = None
+
+
+def _iniciar_worker():
+    """Inicializa el generador PDF una sola vez por proceso"""
+    global _generador_pdf
+    _generador_pdf = GeneradorPDF()
+
+
+def _renderizar_pdf(parametros):
+    """Renderiza una liquidación dentro de un proceso del pool"""
+    return _generador_pdf.generar_liquidacion_pdf(**parametros)
+
+
+class ErrorServicio(Exception):
+    """Error con código HTTP asociado"""
+
+    def __init__(self, estado, mensaje):
+        super().__init__(mensaje)
+        self.estado = estado
+
+
+class ServicioLiquidaciones:
+    """
+    Lógica del servicio: consultas sobre el generador y render en un pool acotado
+
+    El pool tiene `max_workers` procesos y admite hasta `max_pendientes`
+    solicitudes en cola; por encima de eso se rechaza con 503 (backpressure).
+
+    Un render que ya empezó no se puede cancelar: si vence el timeout se
+    terminan los procesos del pool y se crea uno nuevo, para que un render
+    colgado no retenga su proceso ni su cupo. Los demás renders en curso o en
+    cola en ese pool fallan y se responden con 503 para que el cliente reintente.
+    """
+
+    def __init__(self, gen, max_workers=2, max_pendientes=8, timeout=30):
+        self.gen = gen
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.capacidad = max_workers + max_pendientes
+        self._rucs = {float(r) for r in gen.obtener_rucs()}
+        self._cupos = threading.BoundedSemaphore(self.capacidad)
+        self._lock = threading.Lock()
+        self._lock_pool = threading.Lock()
+        self._en_curso = 0
+        self.reciclados = 0
+        self._pool = self._crear_pool()
+
+    def _crear_pool(self):
+        return ProcessPoolExecutor(max_workers=self.max_workers, initializer=_iniciar_worker)
+
+    def cerrar(self):
+        """Libera los procesos del pool"""
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _reciclar_pool(self, pool_vencido):
+        """Termina los procesos de un pool con un render vencido y crea uno nuevo"""
+        with self._lock_pool:
+            if self._pool is not pool_vencido:
+                # Otra solicitud vencida ya lo recicló
+                return
+            self._pool = self._crear_pool()
+            self.reciclados += 1
+
+        # ProcessPoolExecutor no expone cómo terminar sus procesos: se usa el
+        # atributo privado _processes de CPython (dict pid -> Process). Si falta,
+        # el render vencido termina por su cuenta antes de liberar su cupo.
+        # Al morir los procesos, el pool queda roto y sus futures terminan con
+        # BrokenProcessPool; los que seguían en cola se cancelan.
+        procesos = getattr(pool_vencido, '_processes', None) or {}
+        for proceso in list(procesos.values()):
+            proceso.terminate()
+        pool_vencido.shutdown(wait=False, cancel_futures=True)
+
+    def estado(self):
+        """Ocupación actual del pool"""
+        with self._lock:
+            en_curso = self._en_curso
+        return {
+            'estado': 'ok',
+            'workers': self.max_workers,
+            'capacidad': self.capacidad,
+            'en_curso': en_curso,
+            'reciclados': self.reciclados,
+        }
+
+    def _validar_ruc(self, ruc):
+        try:
+            ruc_float = float(ruc)
+        except (TypeError, ValueError):
+            raise ErrorServicio(400, f"RUC inválido: {ruc}")
+        if ruc_float not in self._rucs:
+            raise ErrorServicio(404, f"RUC no encontrado: {ruc}")
+        return ruc_float
+
+    def _obtener_caso(self, ruc, campana):
+        ruc_float = self._validar_ruc(ruc)
+        if not campana:
+            raise ErrorServicio(400, "Falta el parámetro 'campana'")
+        if campana not in self.gen.obtener_campanas_ruc(ruc_float):
+            raise ErrorServicio(404, f"Campaña no encontrada para el RUC: {campana}")
+        datos = self.gen.filtrar_por_ruc_campana(ruc_float, campana)
+        if len(datos) == 0:
+            raise ErrorServicio(404, f"El caso no tiene registros: {campana}")
+        return ruc_float, datos
+
+    def consultar_caso(self, ruc):
+        """Campañas disponibles para un RUC"""
+        ruc_float = self._validar_ruc(ruc)
+        return {
+            'ruc': str(int(ruc_float)),
+            'campanas': list(self.gen.obtener_campanas_ruc(ruc_float)),
+        }
+
+    def consultar_totales(self, ruc, campana, periodos=None):
+        """Totales del caso con los períodos seleccionados"""
+        ruc_float, datos = self._obtener_caso(ruc, campana)
+        datos_filtrados = filtrar_periodos(datos, periodos)
+        respuesta = {
+            'ruc': str(int(ruc_float)),
+            'campana': campana,
+            'razon_social': str(datos.iloc[0]['RAZON_SOCIAL']),
+            'periodos_disponibles': sorted(extraer_periodos(datos).unique().tolist()),
+        }
+        respuesta.update(calcular_totales(datos_filtrados))
+        return respuesta
+
+    def generar_pdf(self, ruc, campana, periodos=None, direccion="", fecha_pago=None):
+        """
+        Renderiza la liquidación en el pool de procesos
+
+        Raises:
+            ErrorServicio: 503 si el pool está saturado, 504 si vence el timeout
+        """
+        ruc_float, datos = self._obtener_caso(ruc, campana)
+        datos_filtrados = filtrar_periodos(datos, periodos)
+
+        if not self._cupos.acquire(blocking=False):
+            raise ErrorServicio(503, "Servicio saturado, reintente en unos segundos")
+
+        with self._lock:
+            self._en_curso += 1
+
+        parametros = {
+            'ruc': ruc_float,
+            'campana': campana,
+            'razon_social': datos.iloc[0]['RAZON_SOCIAL'],
+            'datos_ruc': datos_filtrados,
+            'direccion': direccion,
+            'fecha_pago': fecha_pago or datetime.now().strftime('%d/%m/%Y'),
+        }
+        try:
+            with self._lock_pool:
+                pool = self._pool
+                future = pool.submit(_renderizar_pdf, parametros)
+        except Exception:
+            self._liberar_cupo(None)
+            raise
+        # El cupo se libera cuando el trabajo termina, no cuando responde el handler
+        future.add_done_callback(self._liberar_cupo)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FuturesTimeoutError:
+            if not future.cancel():
+                # Ya se está renderizando: solo se libera terminando el proceso
+                self._reciclar_pool(pool)
+            raise ErrorServicio(504, f"Tiempo de generación excedido ({self.timeout}s)")
+        except (BrokenProcessPool, CancelledError):
+            # El pool se recicló por otra solicitud vencida mientras esta esperaba
+            raise ErrorServicio(503, "Pool de render reiniciado, reintente en unos segundos")
+
+    def _liberar_cupo(self, _future):
+        with self._lock:
+            self._en_curso -= 1
+        self._cupos.release()
+
+
+class ManejadorLiquidaciones(BaseHTTPRequestHandler):
+    """Handler HTTP; el servicio se toma de self.server.servicio"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        if getattr(self.server, 'verbose', False):
+            super().log_message(format, *args)
+
+    def _responder(self, estado, cuerpo, tipo="application/json; charset=utf-8", extra=None):
+        self.send_response(estado)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(cuerpo)))
+        for clave, valor in (extra or {}).items():
+            self.send_header(clave, valor)
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def _responder_json(self, estado, datos, extra=None):
+        cuerpo = json.dumps(datos, ensure_ascii=False).encode("utf-8")
+        self._responder(estado, cuerpo, extra=extra)
+
+    def do_GET(self):
+        servicio = self.server.servicio
+        url = urlparse(self.path)
+        query = {clave: valores[0] for clave, valores in parse_qs(url.query).items()}
+        periodos = [p.strip() for p in query.get('periodos', '').split(',') if p.strip()]
+
+        try:
+            if url.path == '/salud':
+                self._responder_json(200, servicio.estado())
+            elif url.path.startswith('/casos/'):
+                ruc = unquote(url.path[len('/casos/'):])
+                self._responder_json(200, servicio.consultar_caso(ruc))
+            elif url.path == '/totales':
+                self._responder_json(200, servicio.consultar_totales(
+                    query.get('ruc'), query.get('campana'), periodos))
+            elif url.path == '/liquidacion.pdf':
+                pdf_bytes = servicio.generar_pdf(
+                    query.get('ruc'), query.get('campana'), periodos,
+                    direccion=query.get('direccion', ''),
+                    fecha_pago=query.get('fecha_pago'),
+                )
+                self._responder(200, pdf_bytes, tipo="application/pdf")
+            else:
+                raise ErrorServicio(404, f"Ruta no encontrada: {url.path}")
+        except ErrorServicio as e:
+            extra = {"Retry-After": "1"} if e.estado == 503 else None
+            self._responder_json(e.estado, {'error': str(e)}, extra=extra)
+        except Exception as e:
+            self._responder_json(500, {'error': f"Error interno: {e}"})
+
+
+def crear_servidor(gen, host="127.0.0.1", port=8502, max_workers=2, max_pendientes=8,
+                   timeout=30, verbose=False):
+    """
+    Crea el servidor HTTP (sin iniciarlo)
+
+    Args:
+        gen: Generador con la interfaz de GeneradorCache
+        host, port: Dirección de escucha (port=0 elige un puerto libre)
+        max_workers: Procesos de render
+        max_pendientes: Solicitudes en cola antes de responder 503
+        timeout: Segundos máximos por PDF
+        verbose: Registrar cada solicitud en stderr
+
+    Returns:
+        ThreadingHTTPServer: Servidor con el atributo `servicio`
+    """
+    servidor = ThreadingHTTPServer((host, port), ManejadorLiquidaciones)
+    servidor.daemon_threads = True
+    servidor.servicio = ServicioLiquidaciones(gen, max_workers, max_pendientes, timeout)
+    servidor.verbose = verbose
+    return servidor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servicio HTTP de liquidaciones")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--workers", type=int, default=2, help="Procesos de render")
+    parser.add_argument("--pendientes", type=int, default=8, help="Cola máxima antes de 503")
+    parser.add_argument("--timeout", type=float, default=30, help="Segundos máximos por PDF")
+    args = parser.parse_args()
+
+    from generador_cache import GeneradorCache
+
+    print("⏳ Cargando datos...")
+    gen = GeneradorCache.obtener_generador(os.path.dirname(__file__))
+    servidor = crear_servidor(gen, args.host, args.port, args.workers, args.pendientes,
+                              args.timeout, verbose=True)
+    print(f"✓ Servicio escuchando en http://{args.host}:{servidor.server_address[1]}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+        servidor.servicio.cerrar()
+
+
+if __name__ == "__main__":
+    main()
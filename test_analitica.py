@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pruebas de los agregados de analítica de cartera"""
+import tempfile
+
+import pandas as pd
+
+from analitica import calcular_analitica, top_deudores
+from datos_compartidos import GeneradorCompartido, publicar
+from datos_sinteticos import GeneradorSintetico
+
+
+def test_agregados():
+    gen = GeneradorSintetico(n_casos=12, filas_por_caso=30)
+    analitica = calcular_analitica(gen)
+
+    assert analitica['resumen']['casos'].sum() == 12
+    assert analitica['resumen']['registros'].sum() == 12 * 30
+    assert analitica['distribucion'].loc['26-50'].sum() == 12
+
+    deuda_total = sum(datos['DEUDA_CON_MORA'].sum() for datos in gen.rucs_por_campana.values())
+    assert abs(analitica['deuda_por_anio'].to_numpy().sum() - deuda_total) < 1e-6
+
+    top = top_deudores(analitica, 'PRESUNTA', n=2)
+    assert len(top) == 2
+    assert (top['campana'] == 'PRESUNTA').all()
+    assert top['deuda'].is_monotonic_decreasing
+
+
+def test_mismos_agregados_con_datos_compartidos():
+    gen = GeneradorSintetico(n_casos=12, filas_por_caso=30)
+    local = calcular_analitica(gen)
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        compartido = calcular_analitica(GeneradorCompartido(directorio))
+
+    for clave in ('casos', 'resumen', 'deuda_por_anio', 'distribucion'):
+        pd.testing.assert_frame_equal(local[clave], compartido[clave])
+
+
+if __name__ == '__main__':
+    test_agregados()
+    test_mismos_agregados_con_datos_compartidos()
+    print('✓ Analítica verificada')
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pruebas de los agregados y el formato de "Ver Datos" contra el cálculo fila por fila"""
+from calculos_liquidacion import agregados_por_periodo, filtrar_periodos, formatear_detalle
+from datos_sinteticos import generar_datos_caso
+
+
+def totales_fila_por_fila(datos):
+    """Cálculo original de "Ver Datos" (recorrido con iterrows)"""
+    total_fondo = total_mora = total_admin = 0
+    for _, row in datos.iterrows():
+        total_fondo += row['DEUDA_CON_MORA']
+        total_mora += row.get('MORA', 0)
+        total_admin += (row['COMISION_NOMINAL'] + row['SEGURO_NOMINAL']
+                        + row['AFP_NOMINAL'])
+    return len(datos), total_fondo, total_mora, total_admin
+
+
+def test_agregados_por_periodo():
+    datos = generar_datos_caso(400, semilla=3)
+    agregados = agregados_por_periodo(datos)
+    periodos_todos = agregados.index.tolist()
+    assert periodos_todos == sorted(datos['OPERACION'].astype(str).str[-6:].unique())
+
+    for periodos in (periodos_todos, periodos_todos[::3], periodos_todos[:1]):
+        seleccion = agregados.loc[periodos]
+        registros, fondo, mora, admin = totales_fila_por_fila(filtrar_periodos(datos, periodos))
+        assert seleccion['registros'].sum() == registros
+        assert abs(seleccion['total_fondo'].sum() - fondo) < 1e-6
+        assert abs(seleccion['total_mora'].sum() - mora) < 1e-6
+        assert abs(seleccion['total_administradora'].sum() - admin) < 1e-6
+
+
+def test_formatear_detalle_pagina():
+    datos = generar_datos_caso(120, semilla=5)
+    datos.loc[datos.index[55], 'OPERACION'] = '2015'
+    pagina = datos.iloc[50:100]
+    tabla = formatear_detalle(pagina)
+
+    assert list(tabla.columns) == ['CUSSP', 'Afiliado', 'Período', 'Fondo', 'Mora',
+                                   'Total Fondo', 'Total Admin']
+    assert len(tabla) == 50
+    assert list(tabla.index) == list(range(50))
+
+    fila = pagina.iloc[0]
+    assert tabla.loc[0, 'CUSSP'] == fila['CUSSP']
+    assert tabla.loc[0, 'Afiliado'] == str(fila['AFILIADO'])
+    assert tabla.loc[0, 'Período'] == str(fila['OPERACION'])[-6:]
+    assert tabla.loc[0, 'Fondo'] == f"{fila['FONDO_NOMINAL']:.2f}"
+    assert tabla.loc[0, 'Mora'] == f"{fila['MORA']:.2f}"
+    assert tabla.loc[0, 'Total Fondo'] == f"{fila['DEUDA_CON_MORA']:.2f}"
+    total_admin = fila['COMISION_NOMINAL'] + fila['SEGURO_NOMINAL'] + fila['AFP_NOMINAL']
+    assert tabla.loc[0, 'Total Admin'] == f"{total_admin:.2f}"
+
+    # Períodos cortos se muestran completos, igual que antes
+    assert tabla.loc[5, 'Período'] == '2015'
+
+
+def test_formatear_detalle_sin_columnas_opcionales():
+    datos = generar_datos_caso(10).drop(columns=['AFILIADO', 'MORA'])
+    tabla = formatear_detalle(datos)
+    assert (tabla['Afiliado'] == '').all()
+    assert (tabla['Mora'] == '0.00').all()
+
+
+if __name__ == '__main__':
+    test_agregados_por_periodo()
+    test_formatear_detalle_pagina()
+    test_formatear_detalle_sin_columnas_opcionales()
+    print('✓ Cálculos de "Ver Datos" verificados')
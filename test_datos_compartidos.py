@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pruebas de publicación y conexión a los datos compartidos"""
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from datos_compartidos import GeneradorCompartido, publicar
+from datos_sinteticos import GeneradorSintetico
+
+
+def test_conexion_sin_copia():
+    gen = GeneradorSintetico(n_casos=6, filas_por_caso=40)
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        compartido = GeneradorCompartido(directorio)
+
+        assert compartido.obtener_rucs() == gen.obtener_rucs()
+        assert compartido.num_registros == 6 * 40
+        for ruc, campana in gen.rucs_por_campana:
+            assert compartido.obtener_campanas_ruc(ruc) == gen.obtener_campanas_ruc(ruc)
+            pd.testing.assert_frame_equal(
+                compartido.filtrar_por_ruc_campana(ruc, campana),
+                gen.filtrar_por_ruc_campana(ruc, campana),
+                check_dtype=False,
+            )
+
+        # Las columnas numéricas son memory-mapped en solo lectura
+        fondo = compartido.columna('FONDO_NOMINAL')
+        assert isinstance(fondo, np.memmap)
+        assert not fondo.flags.writeable
+
+
+def test_nulos_y_fechas():
+    gen = GeneradorSintetico(n_casos=3, filas_por_caso=20)
+    for i, datos in enumerate(gen.rucs_por_campana.values()):
+        datos.loc[datos.index[i], 'AFILIADO'] = None
+        datos['FECHA_PAGO'] = pd.date_range('2021-01-01', periods=len(datos), freq='D')
+        datos.loc[datos.index[-1], 'FECHA_PAGO'] = pd.NaT
+        datos['FECHA_ZONA'] = pd.date_range('2021-01-01', periods=len(datos), freq='h',
+                                            tz='America/Lima')
+
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        compartido = GeneradorCompartido(directorio)
+        for ruc, campana in gen.rucs_por_campana:
+            original = gen.filtrar_por_ruc_campana(ruc, campana)
+            leido = compartido.filtrar_por_ruc_campana(ruc, campana)
+            # Un nulo no debe tomar el valor de otra fila
+            assert leido['AFILIADO'].isna().tolist() == original['AFILIADO'].isna().tolist()
+            pd.testing.assert_frame_equal(leido, original, check_dtype=False)
+            assert leido['FECHA_PAGO'].dtype.kind == 'M'
+            assert str(leido['FECHA_ZONA'].dt.tz) == 'America/Lima'
+
+
+def test_cambio_de_generacion():
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(GeneradorSintetico(n_casos=2, filas_por_caso=10), directorio)
+        compartido = GeneradorCompartido(directorio)
+        version_inicial = compartido.version
+
+        assert not compartido.actualizar()
+
+        publicar(GeneradorSintetico(n_casos=3, filas_por_caso=10, semilla=7), directorio)
+        assert compartido.actualizar()
+        assert compartido.version != version_inicial
+        assert len(compartido.rucs_por_campana) == 3
+
+
+if __name__ == '__main__':
+    test_conexion_sin_copia()
+    test_nulos_y_fechas()
+    test_cambio_de_generacion()
+    print('✓ Datos compartidos verificados')
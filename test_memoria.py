@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pruebas de presupuesto de memoria
+Fallan si el pico o la memoria retenida de una carga sintética supera el presupuesto.
+"""
+import gc
+import tempfile
+import threading
+import time
+
+import memoria
+from analitica import calcular_analitica
+from datos_compartidos import GeneradorCompartido, publicar
+from datos_sinteticos import GeneradorSintetico, generar_datos_caso
+from generador_pdf import GeneradorPDF
+from memoria import MedidorMemoria
+
+# Presupuestos en MB para la carga sintética de cada prueba
+PRESUPUESTOS_MB = {
+    'carga_compartida_retenido': 1.0,    # 20,000 registros conectados por mmap
+    'busqueda_caso_pico': 2.0,           # un caso de 200 registros
+    'busqueda_caso_retenido': 0.5,       # 50 búsquedas seguidas
+    'render_pdf_pico': 12.0,             # un caso de 800 registros
+    'render_pdf_retenido': 1.0,          # 10 renders seguidos, proceso ya caliente
+    'render_pdf_rss_crecimiento': 8.0,   # los mismos 10 renders, RSS del proceso
+    'analitica_compartida_pico': 8.0,    # 50,000 registros, razón social de 125 caracteres
+}
+
+
+def test_carga_compartida():
+    gen = GeneradorSintetico(n_casos=100, filas_por_caso=200)
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        del gen
+        gc.collect()
+
+        with MedidorMemoria("carga_cache") as medicion:
+            compartido = GeneradorCompartido(directorio)
+        assert compartido.num_registros == 20000
+        assert medicion.retenido_mb < PRESUPUESTOS_MB['carga_compartida_retenido'], \
+            medicion.resumen()
+        del compartido
+
+
+def test_busqueda_caso():
+    gen = GeneradorSintetico(n_casos=50, filas_por_caso=200)
+    casos = list(gen.rucs_por_campana)
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        compartido = GeneradorCompartido(directorio)
+
+        with MedidorMemoria("busqueda_caso") as medicion:
+            for ruc, campana in casos:
+                datos = compartido.filtrar_por_ruc_campana(ruc, campana)
+            del datos
+            gc.collect()
+        assert medicion.pico_mb < PRESUPUESTOS_MB['busqueda_caso_pico'], medicion.resumen()
+        assert medicion.retenido_mb < PRESUPUESTOS_MB['busqueda_caso_retenido'], \
+            medicion.resumen()
+        del compartido
+
+
+def test_analitica_compartida():
+    gen = GeneradorSintetico(n_casos=100, filas_por_caso=500)
+    for i, datos in enumerate(gen.rucs_por_campana.values()):
+        datos['RAZON_SOCIAL'] = f"EMPRESA {i:03d} " + "X" * 113
+    with tempfile.TemporaryDirectory() as directorio:
+        publicar(gen, directorio)
+        del gen, datos
+        gc.collect()
+        compartido = GeneradorCompartido(directorio)
+
+        # Las columnas de texto no se decodifican completas
+        with MedidorMemoria("analitica") as medicion:
+            analitica = calcular_analitica(compartido)
+        assert analitica['resumen']['registros'].sum() == 50000
+        assert medicion.pico_mb < PRESUPUESTOS_MB['analitica_compartida_pico'], \
+            medicion.resumen()
+        del compartido
+
+
+def test_pico_render_pdf():
+    generador = GeneradorPDF()
+    datos = generar_datos_caso(800)
+    # El primer render carga fuentes y estilos de reportlab
+    generador.generar_liquidacion_pdf(20100000000.0, "PRESUNTA", "EMPRESA", datos.iloc[:10])
+
+    with MedidorMemoria("render_pdf") as medicion:
+        pdf_bytes = generador.generar_liquidacion_pdf(20100000000.0, "PRESUNTA", "EMPRESA", datos)
+    assert pdf_bytes.startswith(b'%PDF')
+    assert medicion.pico_mb < PRESUPUESTOS_MB['render_pdf_pico'], medicion.resumen()
+
+
+def test_render_pdf_sin_fugas():
+    generador = GeneradorPDF()
+    datos = generar_datos_caso(100)
+    for _ in range(2):
+        generador.generar_liquidacion_pdf(20100000000.0, "PRESUNTA", "EMPRESA", datos)
+    gc.collect()
+
+    with MedidorMemoria("render_pdf") as medicion:
+        for _ in range(10):
+            generador.generar_liquidacion_pdf(20100000000.0, "PRESUNTA", "EMPRESA", datos)
+        gc.collect()
+    assert medicion.retenido_mb < PRESUPUESTOS_MB['render_pdf_retenido'], medicion.resumen()
+    # tracemalloc no ve la memoria de extensiones en C; el RSS sí (si se puede leer)
+    if medicion.rss_crecimiento_mb is not None:
+        assert medicion.rss_crecimiento_mb < PRESUPUESTOS_MB['render_pdf_rss_crecimiento'], \
+            medicion.resumen()
+
+
+def test_medicion_integrada():
+    memoria.activar()
+    try:
+        with memoria.medir("prueba") as medicion:
+            bloque = bytearray(2 * memoria.MB)
+        del bloque
+        assert medicion.pico_mb >= 2
+        assert memoria.ultima_medicion("prueba") is medicion
+    finally:
+        memoria.activar(False)
+
+    with memoria.medir("prueba") as medicion:
+        assert medicion is None
+
+
+def test_mediciones_no_se_superponen():
+    memoria.activar()
+    try:
+        intervalos = {}
+        en_render = threading.Event()
+
+        def render_precarga():
+            with memoria.medir("render_pdf"):
+                en_render.set()
+                bloque = bytearray(8 * memoria.MB)
+                time.sleep(0.2)
+                del bloque
+                intervalos['render_pdf'] = time.perf_counter()
+
+        hilo = threading.Thread(target=render_precarga)
+        hilo.start()
+        assert en_render.wait(10)
+        with memoria.medir("busqueda_caso") as medicion:
+            intervalos['busqueda_caso'] = time.perf_counter()
+        hilo.join()
+
+        # La búsqueda empezó después del render y no incluye su bloque
+        assert intervalos['busqueda_caso'] > intervalos['render_pdf']
+        assert medicion.pico_mb < 1, medicion.resumen()
+        assert memoria.ultima_medicion("render_pdf").pico_mb >= 8
+    finally:
+        memoria.activar(False)
+
+
+if __name__ == '__main__':
+    test_carga_compartida()
+    test_busqueda_caso()
+    test_analitica_compartida()
+    test_pico_render_pdf()
+    test_render_pdf_sin_fugas()
+    test_medicion_integrada()
+    test_mediciones_no_se_superponen()
+    print('✓ Presupuestos de memoria verificados')
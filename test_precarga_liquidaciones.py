@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pruebas de la precarga especulativa de liquidaciones"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from datos_sinteticos import GeneradorSintetico
+from generador_pdf import GeneradorPDF
+from precarga_liquidaciones import PrecargaLiquidaciones
+
+FECHA = '19/10/2026'
+
+
+def test_sirve_pdf_precargado():
+    gen = GeneradorSintetico(n_casos=2, filas_por_caso=20)
+    (ruc, campana), _ = gen.rucs_por_campana
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        precarga = PrecargaLiquidaciones(ejecutor, gen, GeneradorPDF())
+        precarga.programar(ruc, [campana], FECHA)
+        wait(precarga._futures.values())
+
+        pdf_bytes = precarga.obtener(ruc, campana, FECHA, timeout=60)
+        assert pdf_bytes.startswith(b'%PDF')
+
+        # Otra fecha u otra versión de datos no reutilizan la precarga
+        assert precarga.obtener(ruc, campana, '01/01/2020') is None
+        assert precarga.obtener(ruc, campana, FECHA, version='otra') is None
+
+
+def test_cambio_de_ruc_cancela():
+    gen = GeneradorSintetico(n_casos=2, filas_por_caso=20)
+    (ruc_a, campana_a), (ruc_b, campana_b) = gen.rucs_por_campana
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        precarga = PrecargaLiquidaciones(ejecutor, gen, GeneradorPDF())
+        precarga.programar(ruc_a, [campana_a], FECHA)
+
+        precarga.programar(ruc_b, [campana_b], FECHA)
+        wait(precarga._futures.values())
+        assert precarga.obtener(ruc_a, campana_a, FECHA) is None
+        assert precarga.obtener(ruc_b, campana_b, FECHA, timeout=60).startswith(b'%PDF')
+
+        precarga.cancelar()
+        assert precarga.obtener(ruc_b, campana_b, FECHA) is None
+
+
+def test_pendiente_se_cancela():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=20)
+    ((ruc, campana),) = gen.rucs_por_campana
+    liberar = threading.Event()
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        # Otra sesión ocupa el único hilo del ejecutor compartido
+        ocupado = ejecutor.submit(liberar.wait)
+        precarga = PrecargaLiquidaciones(ejecutor, gen, GeneradorPDF())
+        precarga.programar(ruc, [campana], FECHA)
+        future = precarga._futures[campana]
+
+        # No se espera detrás de la cola: se cancela y la app renderiza directo
+        assert precarga.obtener(ruc, campana, FECHA) is None
+        assert future.cancelled()
+        liberar.set()
+        ocupado.result()
+
+
+class GeneradorPDFBloqueado:
+    """Render que no termina hasta que la prueba lo libera"""
+
+    def __init__(self):
+        self.iniciado = threading.Event()
+        self.liberar = threading.Event()
+
+    def generar_liquidacion_pdf(self, **_parametros):
+        self.iniciado.set()
+        self.liberar.wait()
+        return b'%PDF'
+
+
+def test_espera_acotada_en_curso():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=20)
+    ((ruc, campana),) = gen.rucs_por_campana
+    gen_pdf = GeneradorPDFBloqueado()
+    with ThreadPoolExecutor(max_workers=1) as ejecutor:
+        precarga = PrecargaLiquidaciones(ejecutor, gen, gen_pdf)
+        precarga.programar(ruc, [campana], FECHA)
+        assert gen_pdf.iniciado.wait(10)
+
+        # Vence la espera y la app renderiza directo
+        assert precarga.obtener(ruc, campana, FECHA, timeout=0.1) is None
+        gen_pdf.liberar.set()
+        assert precarga.obtener(ruc, campana, FECHA, timeout=10) == b'%PDF'
+
+
+if __name__ == '__main__':
+    test_sirve_pdf_precargado()
+    test_cambio_de_ruc_cancela()
+    test_pendiente_se_cancela()
+    test_espera_acotada_en_curso()
+    print('✓ Precarga verificada')
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Pruebas del servicio HTTP de liquidaciones contra localhost"""
+import json
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from datos_sinteticos import GeneradorSintetico
+from servidor_liquidaciones import crear_servidor
+
+
+def iniciar(gen, **kwargs):
+    servidor = crear_servidor(gen, port=0, **kwargs)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}"
+
+
+def detener(servidor):
+    servidor.shutdown()
+    servidor.server_close()
+    servidor.servicio.cerrar()
+
+
+def obtener(url):
+    try:
+        with urllib.request.urlopen(url, timeout=60) as respuesta:
+            return respuesta.status, respuesta.headers, respuesta.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers, e.read()
+
+
+def test_endpoints():
+    gen = GeneradorSintetico(n_casos=4, filas_por_caso=30)
+    ruc, campana = next(iter(gen.rucs_por_campana))
+    ruc_str = str(int(ruc))
+    servidor, base = iniciar(gen)
+    try:
+        estado, _, cuerpo = obtener(f"{base}/casos/{ruc_str}")
+        assert estado == 200
+        assert json.loads(cuerpo)['campanas'] == [campana]
+
+        estado, _, _ = obtener(f"{base}/casos/99999999999")
+        assert estado == 404
+
+        campana_url = urllib.parse.quote(campana)
+        estado, _, cuerpo = obtener(f"{base}/totales?ruc={ruc_str}&campana={campana_url}")
+        totales = json.loads(cuerpo)
+        assert estado == 200
+        assert totales['registros'] == 30
+
+        periodo = totales['periodos_disponibles'][0]
+        estado, _, cuerpo = obtener(
+            f"{base}/totales?ruc={ruc_str}&campana={campana_url}&periodos={periodo}")
+        assert json.loads(cuerpo)['registros'] < 30
+
+        estado, cabeceras, cuerpo = obtener(
+            f"{base}/liquidacion.pdf?ruc={ruc_str}&campana={campana_url}")
+        assert estado == 200
+        assert cabeceras['Content-Type'] == 'application/pdf'
+        assert cuerpo.startswith(b'%PDF')
+    finally:
+        detener(servidor)
+
+
+def test_backpressure():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=3000)
+    ruc, campana = next(iter(gen.rucs_por_campana))
+    url = (f"http://127.0.0.1:{{}}/liquidacion.pdf?ruc={int(ruc)}"
+           f"&campana={urllib.parse.quote(campana)}")
+    servidor, _ = iniciar(gen, max_workers=1, max_pendientes=0)
+    try:
+        puerto = servidor.server_address[1]
+        estados = []
+        hilos = [threading.Thread(target=lambda: estados.append(obtener(url.format(puerto))[0]))
+                 for _ in range(4)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert 200 in estados
+        assert 503 in estados
+    finally:
+        detener(servidor)
+
+
+def test_timeout_recicla_pool():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=3000)
+    ruc, campana = next(iter(gen.rucs_por_campana))
+    servidor, base = iniciar(gen, max_workers=1, max_pendientes=0, timeout=0.05)
+    url = f"{base}/liquidacion.pdf?ruc={int(ruc)}&campana={urllib.parse.quote(campana)}"
+    try:
+        estado, _, cuerpo = obtener(url)
+        assert estado == 504
+        assert 'error' in json.loads(cuerpo)
+
+        # El render vencido no retiene su proceso ni su cupo
+        servicio = servidor.servicio
+        limite = time.time() + 30
+        while servicio.estado()['en_curso'] and time.time() < limite:
+            time.sleep(0.05)
+        assert servicio.estado()['en_curso'] == 0
+        assert servicio.estado()['reciclados'] == 1
+
+        servicio.timeout = 60
+        estado, _, cuerpo = obtener(url)
+        assert estado == 200
+        assert cuerpo.startswith(b'%PDF')
+    finally:
+        detener(servidor)
+
+
+def test_timeout_con_solicitudes_en_cola():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=8000)
+    ruc, campana = next(iter(gen.rucs_por_campana))
+    servidor, base = iniciar(gen, max_workers=1, max_pendientes=3, timeout=0.5)
+    url = f"{base}/liquidacion.pdf?ruc={int(ruc)}&campana={urllib.parse.quote(campana)}"
+    servicio = servidor.servicio
+    try:
+        respuestas = {}
+
+        def pedir(nombre):
+            respuestas[nombre] = obtener(url)
+
+        vencida = threading.Thread(target=pedir, args=('vencida',))
+        vencida.start()
+        time.sleep(0.2)
+        # Las siguientes quedan en cola detrás del render que vence y no vencen solas
+        servicio.timeout = 60
+        en_cola = [threading.Thread(target=pedir, args=(i,)) for i in range(3)]
+        for hilo in en_cola:
+            hilo.start()
+        for hilo in [vencida] + en_cola:
+            hilo.join()
+
+        assert respuestas['vencida'][0] == 504
+        for i in range(3):
+            estado, cabeceras, _ = respuestas[i]
+            assert estado == 503
+            assert cabeceras['Retry-After'] == '1'
+        limite = time.time() + 30
+        while servicio.estado()['en_curso'] and time.time() < limite:
+            time.sleep(0.05)
+        assert servicio.estado()['en_curso'] == 0
+        assert servicio.estado()['reciclados'] == 1
+    finally:
+        detener(servidor)
+
+
+def test_caso_vacio():
+    gen = GeneradorSintetico(n_casos=1, filas_por_caso=10)
+    (ruc, campana), datos = next(iter(gen.rucs_por_campana.items()))
+    gen.rucs_por_campana[(ruc, campana)] = datos.iloc[:0]
+    servidor, base = iniciar(gen)
+    consulta = f"ruc={int(ruc)}&campana={urllib.parse.quote(campana)}"
+    try:
+        assert obtener(f"{base}/totales?{consulta}")[0] == 404
+        assert obtener(f"{base}/liquidacion.pdf?{consulta}")[0] == 404
+    finally:
+        detener(servidor)
+
+
+if __name__ == '__main__':
+    test_endpoints()
+    test_backpressure()
+    test_timeout_recicla_pool()
+    test_timeout_con_solicitudes_en_cola()
+    test_caso_vacio()
+    print('✓ Servicio HTTP verificado')